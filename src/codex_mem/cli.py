@@ -1,90 +1,98 @@
 from __future__ import annotations
 
-import json
+import argparse
 import sys
 from pathlib import Path
-from typing import Optional
 
-import typer
+# Annotations are lazy strings, so typing is only needed by type checkers.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
 
-from codex_mem.config import Settings
-from codex_mem.models import MemoryCandidate, MemoryKind
-from codex_mem.notify import ingest_event
-from codex_mem.paths import detect_project_root, ensure_base_dir
-from codex_mem.spool import clear as clear_spool
-from codex_mem.spool import read_all as read_spool
-from codex_mem.store import Store
+    from codex_mem.config import Settings
+    from codex_mem.store import Store
 
-app = typer.Typer(help="codex-mem CLI")
+_CONFIG_SNIPPET = """\
+# Turn capture
+notify = ["%(python)s", "-m", "codex_mem.notify"]
+
+# MCP server
+[mcp_servers.codex_mem]
+command = "%(python)s"
+args = ["-m", "codex_mem.mcp_server"]
+startup_timeout_sec = 10.0
+tool_timeout_sec = 60.0"""
 
 
 def _get_store(settings: Settings) -> Store:
+    from codex_mem.store import Store
+
     return Store(settings)
 
 
-@app.command()
-def init() -> None:
+def _err(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+def init() -> int:
     """Initialize codex-mem and print config snippet."""
-    settings = Settings.from_env()
+    from codex_mem.config import get_settings
+    from codex_mem.paths import ensure_base_dir
+
+    settings = get_settings()
     store = _get_store(settings)
     store.close()
     base = ensure_base_dir()
     python_cmd = sys.executable
-    snippet = f'''
-# Turn capture
-notify = ["{python_cmd}", "-m", "codex_mem.notify"]
-
-# MCP server
-[mcp_servers.codex_mem]
-command = "{python_cmd}"
-args = ["-m", "codex_mem.mcp_server"]
-startup_timeout_sec = 10.0
-tool_timeout_sec = 60.0
-'''
-    typer.echo(f"Initialized codex-mem at {base}")
-    typer.echo("Paste this into ~/.codex/config.toml:")
-    typer.echo(snippet.strip())
+    print(f"Initialized codex-mem at {base}")
+    print("Paste this into ~/.codex/config.toml:")
+    print(_CONFIG_SNIPPET % {"python": python_cmd})
+    return 0
 
 
-@app.command()
-def serve() -> None:
+def serve() -> int:
     """Run MCP server (stdio)."""
     from codex_mem.mcp_server import run
 
     run()
+    return 0
 
 
-@app.command()
-def search(
-    query: str = typer.Argument(..., help="FTS query"),
-    cwd: str | None = typer.Option(None, help="Project cwd for scoping"),
-    limit: int = typer.Option(20, help="Max results"),
-) -> None:
-    settings = Settings.from_env()
+def search(query: str, cwd: str | None = None, limit: int = 20) -> int:
+    """Search memories."""
+    from codex_mem.config import get_settings
+    from codex_mem.paths import detect_project_root
+
+    settings = get_settings()
     store = _get_store(settings)
     project_root = detect_project_root(Path(cwd), settings.root_markers) if cwd else None
     rows = store.search(query, project_root, limit, include_global=True)
     for row in rows:
-        typer.echo(f"[{row['id']}] ({row['kind']}) {row['text']}")
+        print(f"[{row['id']}] ({row['kind']}) {row['text']}")
     store.close()
+    return 0
 
 
-@app.command()
 def add(
-    text: str = typer.Argument(..., help="Memory text"),
-    kind: str = typer.Option("fact", help="Kind of memory"),
-    cwd: str | None = typer.Option(None, help="Project cwd"),
-    project_scoped: bool = typer.Option(True, help="Scope to project"),
-    importance: int = typer.Option(3, help="Importance 1-5"),
-    tags: list[str] = typer.Option(None, help="Tags"),
-) -> None:
-    settings = Settings.from_env()
-    store = _get_store(settings)
+    text: str,
+    kind: str = "fact",
+    cwd: str | None = None,
+    project_scoped: bool = True,
+    importance: int = 3,
+    tags: list[str] | None = None,
+) -> int:
+    """Add a memory."""
+    from codex_mem.config import get_settings
+    from codex_mem.models import MemoryCandidate, MemoryKind
+    from codex_mem.paths import detect_project_root
+
     try:
         mem_kind = MemoryKind(kind)
     except ValueError:
-        typer.echo(f"Unknown kind: {kind}", err=True)
-        raise typer.Exit(code=1)
+        _err(f"Unknown kind: {kind}")
+        return 1
+    settings = get_settings()
+    store = _get_store(settings)
     project_root = (
         detect_project_root(Path(cwd), settings.root_markers) if project_scoped and cwd else None
     )
@@ -92,88 +100,203 @@ def add(
         kind=mem_kind, text=text, importance=importance, tags=tuple(tags or [])
     )
     mem_id = store.add_memory(candidate, project_root=project_root)
-    typer.echo(f"Added memory id={mem_id}")
+    print(f"Added memory id={mem_id}")
     store.close()
+    return 0
+
 
+def forget(memory_id: int) -> int:
+    """Soft delete a memory."""
+    from codex_mem.config import get_settings
 
-@app.command()
-def forget(memory_id: int = typer.Argument(..., help="ID to delete")) -> None:
-    settings = Settings.from_env()
+    settings = get_settings()
     store = _get_store(settings)
     ok = store.soft_delete(memory_id)
     store.close()
     if not ok:
-        typer.echo("Memory not found", err=True)
-        raise typer.Exit(code=1)
-    typer.echo("Deleted")
-
-
-@app.command()
-def export(
-    fmt: str = typer.Option("markdown", help="markdown|json"),
-    cwd: str | None = typer.Option(None, help="Project cwd"),
-    include_global: bool = typer.Option(True, help="Include global memories"),
-) -> None:
-    settings = Settings.from_env()
+        _err("Memory not found")
+        return 1
+    print("Deleted")
+    return 0
+
+
+def export(fmt: str = "markdown", cwd: str | None = None, include_global: bool = True) -> int:
+    """Export memories as markdown or JSON."""
+    import json
+    import textwrap
+
+    from codex_mem.config import get_settings
+    from codex_mem.paths import detect_project_root
+
+    settings = get_settings()
     store = _get_store(settings)
     project_root = detect_project_root(Path(cwd), settings.root_markers) if cwd else None
-    rows = store.search("*", project_root, limit=500, include_global=include_global)
+    rows = store.iter_all(project_root, include_global=include_global)
+    # Stream rows straight to stdout so memory stays flat on large stores.
+    out = sys.stdout
     if fmt == "json":
-        typer.echo(json.dumps(rows, indent=2))
-    else:
-        lines: list[str] = ["# Memories"]
+        sep = "\n"
+        out.write("[")
         for row in rows:
-            lines.append(f"- [{row['kind']}] {row['text']} (id:{row['id']})")
-        typer.echo("\n".join(lines))
+            out.write(sep + textwrap.indent(json.dumps(row, indent=2), "  "))
+            sep = ",\n"
+        out.write("\n]\n" if sep != "\n" else "]\n")
+    else:
+        out.write("# Memories\n")
+        out.writelines(f"- [{row['kind']}] {row['text']} (id:{row['id']})\n" for row in rows)
     store.close()
+    return 0
 
 
-@app.command()
-def reconcile(spool_file: Optional[Path] = typer.Option(None, help="Override spool file")) -> None:
+def reconcile(spool_file: Path | None = None) -> int:
     """Import spooled turns."""
-    settings = Settings.from_env()
+    import json
+
+    from codex_mem.config import get_settings
+    from codex_mem.notify import ingest_event
+    from codex_mem.spool import claim as claim_spool
+    from codex_mem.spool import clear as clear_spool
+    from codex_mem.spool import read_all as read_spool
+
+    settings = get_settings()
     store = _get_store(settings)
 
     def ingest(entry: dict) -> bool:
         payload = entry.get("payload")
         if not payload:
             return False
-        return ingest_event(payload, settings, store)
+        # A malformed entry must not abort the replay (and leave the claimed file to be
+        # retried forever); ingest_event rolls back its own transaction on error.
+        try:
+            return ingest_event(payload, settings, store)
+        except Exception as exc:
+            _err(f"Skipping spooled entry: {exc}")
+            return False
 
-    entries = read_spool(spool_file)
     result = {"success": 0, "failures": 0}
-    for entry in entries:
-        if ingest(entry):
-            result["success"] += 1
-        else:
-            result["failures"] += 1
-    clear_spool(spool_file)
-    typer.echo(json.dumps(result))
+    # Replay from a claimed copy so turns spooled while we run land in a fresh spool file
+    # instead of being deleted with this one.
+    claimed = claim_spool(spool_file)
+    if claimed is not None:
+        # Each entry commits on its own (inside ingest_event), so extraction never runs while
+        # this replay holds the write lock and live notify hooks wait on at most one turn.
+        for entry in read_spool(claimed):
+            if ingest(entry):
+                result["success"] += 1
+            else:
+                result["failures"] += 1
+        clear_spool(claimed)
+    print(json.dumps(result))
     store.close()
+    return 0
 
 
-@app.command()
-def doctor() -> None:
+def doctor(check: bool = False) -> int:
     """Check codex-mem health."""
-    settings = Settings.from_env()
+    from codex_mem.config import get_settings
+
+    settings = get_settings()
     issues: list[str] = []
     try:
         store = _get_store(settings)
-        cur = store.conn.execute("SELECT COUNT(*) FROM turns")
-        cur.fetchone()
+        health = store.health_check(integrity=check)
         store.close()
+        if check:
+            print(
+                f"DB size {health['size_bytes']} bytes, "
+                f"quick_check {health['quick_check']} in {health['elapsed_ms']} ms"
+            )
+        else:
+            print(f"DB size {health['size_bytes']} bytes, probed in {health['elapsed_ms']} ms")
+        if check and health["quick_check"] != "ok":
+            issues.append(f"DB integrity check failed: {health['quick_check']}")
     except Exception as exc:  # pragma: no cover - defensive
         issues.append(f"DB check failed: {exc}")
     config_path = Path.home() / ".codex" / "config.toml"
     if not config_path.exists():
         issues.append("~/.codex/config.toml not found; add notify + mcp_servers entries")
     if issues:
-        typer.echo("Doctor found issues:")
+        print("Doctor found issues:")
         for issue in issues:
-            typer.echo(f"- {issue}")
-        raise typer.Exit(code=1)
-    typer.echo("codex-mem looks OK.")
+            print(f"- {issue}")
+        return 1
+    print("codex-mem looks OK.")
+    return 0
+
+
+COMMANDS: dict[str, Callable[..., int]] = {
+    "init": init,
+    "serve": serve,
+    "search": search,
+    "add": add,
+    "forget": forget,
+    "export": export,
+    "reconcile": reconcile,
+    "doctor": doctor,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="codex-mem", description="codex-mem CLI")
+    sub = parser.add_subparsers(dest="cmd", metavar="COMMAND")
+
+    sub.add_parser("init", help=init.__doc__)
+    sub.add_parser("serve", help=serve.__doc__)
+
+    p = sub.add_parser("search", help=search.__doc__)
+    p.add_argument("query", help="FTS query")
+    p.add_argument("--cwd", default=None, help="Project cwd for scoping")
+    p.add_argument("--limit", type=int, default=20, help="Max results")
+
+    p = sub.add_parser("add", help=add.__doc__)
+    p.add_argument("text", help="Memory text")
+    p.add_argument("--kind", default="fact", help="Kind of memory")
+    p.add_argument("--cwd", default=None, help="Project cwd")
+    p.add_argument(
+        "--project-scoped",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Scope to project",
+    )
+    p.add_argument("--importance", type=int, default=3, help="Importance 1-5")
+    p.add_argument("--tags", action="append", default=None, help="Tags (repeatable)")
+
+    p = sub.add_parser("forget", help=forget.__doc__)
+    p.add_argument("memory_id", type=int, help="ID to delete")
+
+    p = sub.add_parser("export", help=export.__doc__)
+    p.add_argument(
+        "--format", "--fmt", dest="fmt", choices=("markdown", "json"), default="markdown"
+    )
+    p.add_argument("--cwd", default=None, help="Project cwd")
+    p.add_argument(
+        "--include-global",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Include global memories",
+    )
+
+    p = sub.add_parser("reconcile", help=reconcile.__doc__)
+    p.add_argument("--spool-file", type=Path, default=None, help="Override spool file")
+
+    p = sub.add_parser("doctor", help=doctor.__doc__)
+    p.add_argument(
+        "--check",
+        action="store_true",
+        help="Also run PRAGMA quick_check (reads the whole database)",
+    )
+    return parser
+
+
+def app(argv: Sequence[str] | None = None) -> int:
+    parser = build_parser()
+    args = vars(parser.parse_args(argv))
+    cmd = args.pop("cmd")
+    if cmd is None:
+        parser.print_help()
+        return 1
+    return COMMANDS[cmd](**args)
 
 
 if __name__ == "__main__":  # pragma: no cover
-    app()
+    raise SystemExit(app())
@@ -2,19 +2,20 @@ from __future__ import annotations
 
 import logging
 import os
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List
 
-from pydantic import BaseModel, Field, ValidationError
-
 from codex_mem.paths import DEFAULT_ROOT_MARKERS
 
 
-class Settings(BaseModel):
-    root_markers: List[str] = Field(default_factory=lambda: DEFAULT_ROOT_MARKERS.copy())
+@dataclass(frozen=True, slots=True)
+class Settings:
+    root_markers: List[str] = field(default_factory=lambda: DEFAULT_ROOT_MARKERS.copy())
     remote_enabled: bool = False
-    extra_redact_patterns: List[str] = Field(default_factory=list)
-    allow_globs: List[str] = Field(default_factory=list)
-    deny_globs: List[str] = Field(default_factory=list)
+    extra_redact_patterns: List[str] = field(default_factory=list)
+    allow_globs: List[str] = field(default_factory=list)
+    deny_globs: List[str] = field(default_factory=list)
     max_memories_per_turn: int = 5
     merge_threshold: float = 0.82
     spool_enabled: bool = True
@@ -22,31 +23,39 @@ class Settings(BaseModel):
     include_global_by_default: bool = True
     remote_model: str | None = None
     max_remote_chars: int = 5000
-
-    model_config = {"extra": "ignore"}
+    durable_writes: bool = False
+    fast_pragmas: bool = False
+    db_uri: str | None = None
 
     @classmethod
     def from_env(cls) -> "Settings":
+        # Every field is already coerced by the _parse_* helpers, so no validation pass.
         env = os.environ
-        try:
-            return cls(
-                root_markers=_parse_csv(
-                    env.get("CODEX_MEM_ROOT_MARKERS"), fallback=DEFAULT_ROOT_MARKERS
-                ),
-                remote_enabled=_parse_bool(env.get("CODEX_MEM_REMOTE", "0")),
-                extra_redact_patterns=_parse_csv(env.get("CODEX_MEM_REDACT_PATTERNS")),
-                allow_globs=_parse_csv(env.get("CODEX_MEM_ALLOW")),
-                deny_globs=_parse_csv(env.get("CODEX_MEM_DENY")),
-                max_memories_per_turn=_parse_int(env.get("CODEX_MEM_MAX_PER_TURN"), default=5),
-                merge_threshold=_parse_float(env.get("CODEX_MEM_MERGE_THRESHOLD"), default=0.82),
-                spool_enabled=_parse_bool(env.get("CODEX_MEM_SPOOL_ENABLED", "1")),
-                max_recall_items=_parse_int(env.get("CODEX_MEM_MAX_RECALL"), default=12),
-                include_global_by_default=_parse_bool(env.get("CODEX_MEM_INCLUDE_GLOBAL", "1")),
-                remote_model=env.get("CODEX_MEM_REMOTE_MODEL"),
-                max_remote_chars=_parse_int(env.get("CODEX_MEM_REMOTE_MAX_CHARS"), default=5000),
-            )
-        except ValidationError as exc:
-            raise RuntimeError(f"Invalid codex-mem settings: {exc}") from exc
+        return cls(
+            root_markers=_parse_csv(
+                env.get("CODEX_MEM_ROOT_MARKERS"), fallback=DEFAULT_ROOT_MARKERS
+            ),
+            remote_enabled=_parse_bool(env.get("CODEX_MEM_REMOTE", "0")),
+            extra_redact_patterns=_parse_csv(env.get("CODEX_MEM_REDACT_PATTERNS")),
+            allow_globs=_parse_csv(env.get("CODEX_MEM_ALLOW")),
+            deny_globs=_parse_csv(env.get("CODEX_MEM_DENY")),
+            max_memories_per_turn=_parse_int(env.get("CODEX_MEM_MAX_PER_TURN"), default=5),
+            merge_threshold=_parse_float(env.get("CODEX_MEM_MERGE_THRESHOLD"), default=0.82),
+            spool_enabled=_parse_bool(env.get("CODEX_MEM_SPOOL_ENABLED", "1")),
+            max_recall_items=_parse_int(env.get("CODEX_MEM_MAX_RECALL"), default=12),
+            include_global_by_default=_parse_bool(env.get("CODEX_MEM_INCLUDE_GLOBAL", "1")),
+            remote_model=env.get("CODEX_MEM_REMOTE_MODEL"),
+            max_remote_chars=_parse_int(env.get("CODEX_MEM_REMOTE_MAX_CHARS"), default=5000),
+            durable_writes=_parse_bool(env.get("CODEX_MEM_DURABLE", "0")),
+            fast_pragmas=_parse_bool(env.get("CODEX_MEM_FAST_PRAGMAS", "0")),
+            db_uri=env.get("CODEX_MEM_DB_URI") or None,
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return process-wide settings; env is read once (``cache_clear()`` to re-read)."""
+    return Settings.from_env()
 
 
 def _parse_csv(value: str | None, fallback: list[str] | None = None) -> list[str]:
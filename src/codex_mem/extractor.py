@@ -2,61 +2,48 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Iterable, List
 
 from codex_mem.config import Settings
 from codex_mem.models import MemoryCandidate, MemoryKind, TurnEvent
 
-SENTENCE_SPLIT = re.compile(r"(?<=[.!?\n])\s+")
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from typing import Any
 
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?\n])\s+")
 
-PREFERENCE_PATTERNS = [
-    re.compile(r"\bprefer\b", re.IGNORECASE),
-    re.compile(r"\balways\b", re.IGNORECASE),
-    re.compile(r"\bfrom now on\b", re.IGNORECASE),
-]
-
-DECISION_PATTERNS = [
-    re.compile(r"\bwe (will|decided)\b", re.IGNORECASE),
-    re.compile(r"\bdecision\b", re.IGNORECASE),
-    re.compile(r"\bchoose\b", re.IGNORECASE),
-]
-
-TODO_PATTERNS = [
-    re.compile(r"\bTODO\b"),
-    re.compile(r"\bnext\b", re.IGNORECASE),
-    re.compile(r"\bfollow up\b", re.IGNORECASE),
-    re.compile(r"\bneed to\b", re.IGNORECASE),
-]
-
-FACT_PATTERNS = [
-    re.compile(r"\bus(e|ing)\b", re.IGNORECASE),
-    re.compile(r"\brunning\b", re.IGNORECASE),
-    re.compile(r"\bversion\b", re.IGNORECASE),
-]
-
-PITFALL_PATTERNS = [
-    re.compile(r"\bavoid\b", re.IGNORECASE),
-    re.compile(r"\bdon't\b", re.IGNORECASE),
-    re.compile(r"\bissue\b", re.IGNORECASE),
-    re.compile(r"\bfails?\b", re.IGNORECASE),
-]
-
-WORKFLOW_PATTERNS = [
-    re.compile(r"\bworkflow\b", re.IGNORECASE),
-    re.compile(r"\bprocess\b", re.IGNORECASE),
-    re.compile(r"\bsteps\b", re.IGNORECASE),
-]
-
-REFERENCE_PATTERNS = [
-    re.compile(r"\bsee\b", re.IGNORECASE),
-    re.compile(r"\bref(erence)?\b", re.IGNORECASE),
-    re.compile(r"\bdoc\b", re.IGNORECASE),
-    re.compile(r"\burl\b", re.IGNORECASE),
-]
-
-
-def extract_memories(turn: TurnEvent, settings: Settings) -> List[MemoryCandidate]:
+# openai is optional and only needed for remote extraction; import it at most once.
+_openai: Any = None
+_openai_tried = False
+
+
+# One alternation per kind so each check is a single C-level scan of the sentence.
+PREFERENCE_RE = re.compile(r"\b(?:prefer|always|from now on)\b", re.IGNORECASE)
+DECISION_RE = re.compile(r"\b(?:we (?:will|decided)|decision|choose)\b", re.IGNORECASE)
+TODO_RE = re.compile(r"\b(?:(?-i:TODO)|next|follow up|need to)\b", re.IGNORECASE)
+FACT_RE = re.compile(r"\b(?:us(?:e|ing)|running|version)\b", re.IGNORECASE)
+PITFALL_RE = re.compile(r"\b(?:avoid|don't|issue|fails?)\b", re.IGNORECASE)
+WORKFLOW_RE = re.compile(r"\b(?:workflow|process|steps)\b", re.IGNORECASE)
+REFERENCE_RE = re.compile(r"\b(?:see|ref(?:erence)?|doc|url)\b", re.IGNORECASE)
+
+# Checked in order; the first kind that matches wins.
+_CHECKS: tuple[tuple[re.Pattern[str], MemoryKind], ...] = (
+    (PREFERENCE_RE, MemoryKind.PREFERENCE),
+    (DECISION_RE, MemoryKind.DECISION),
+    (TODO_RE, MemoryKind.TODO),
+    (PITFALL_RE, MemoryKind.PITFALL),
+    (WORKFLOW_RE, MemoryKind.WORKFLOW),
+    (REFERENCE_RE, MemoryKind.REFERENCE),
+    (FACT_RE, MemoryKind.FACT),
+)
+
+# Substring (not word) matches, ASCII-only case folding, mirroring `word in sentence.lower()`.
+IMPORTANCE_RE = re.compile(r"always|never|must|should|maybe|optional", re.IGNORECASE | re.ASCII)
+IMPORTANCE_RANK = {"always": 5, "never": 5, "must": 5, "should": 4, "maybe": 2, "optional": 2}
+
+
+def extract_memories(turn: TurnEvent, settings: Settings) -> list[MemoryCandidate]:
     if settings.remote_enabled:
         remote_result = _try_remote_extract(turn, settings)
         if remote_result is not None:
@@ -64,61 +51,76 @@ def extract_memories(turn: TurnEvent, settings: Settings) -> List[MemoryCandidat
     return _rule_based_extract(turn, settings.max_memories_per_turn)
 
 
-def _rule_based_extract(turn: TurnEvent, limit: int) -> List[MemoryCandidate]:
+def _rule_based_extract(turn: TurnEvent, limit: int) -> list[MemoryCandidate]:
     source_text = "\n".join(
         [msg.content for msg in turn.input_messages] + [turn.assistant_message.content]
     )
-    sentences = _split_sentences(source_text)
     candidates: list[MemoryCandidate] = []
 
-    for sentence in sentences:
+    for sentence in _iter_sentences(source_text):
         kind = _classify_sentence(sentence)
         if kind is None:
             continue
         importance = _importance_for_sentence(sentence)
-        candidate = MemoryCandidate(kind=kind, text=sentence.strip(), importance=importance)
+        candidate = MemoryCandidate(kind=kind, text=sentence, importance=importance)
         candidates.append(candidate)
         if len(candidates) >= limit:
             break
     return candidates
 
 
-def _split_sentences(text: str) -> list[str]:
-    raw_sentences = SENTENCE_SPLIT.split(text)
-    return [s.strip() for s in raw_sentences if s.strip()]
+def _iter_sentences(text: str) -> Iterator[str]:
+    """Yield stripped, non-empty sentences lazily so extraction can stop at its limit."""
+    start = 0
+    for boundary in SENTENCE_SPLIT.finditer(text):
+        sentence = text[start : boundary.start()].strip()
+        if sentence:
+            yield sentence
+        start = boundary.end()
+    tail = text[start:].strip()
+    if tail:
+        yield tail
 
 
 def _classify_sentence(sentence: str) -> MemoryKind | None:
-    checks: list[tuple[Iterable[re.Pattern[str]], MemoryKind]] = [
-        (PREFERENCE_PATTERNS, MemoryKind.PREFERENCE),
-        (DECISION_PATTERNS, MemoryKind.DECISION),
-        (TODO_PATTERNS, MemoryKind.TODO),
-        (PITFALL_PATTERNS, MemoryKind.PITFALL),
-        (WORKFLOW_PATTERNS, MemoryKind.WORKFLOW),
-        (REFERENCE_PATTERNS, MemoryKind.REFERENCE),
-        (FACT_PATTERNS, MemoryKind.FACT),
-    ]
-    for patterns, kind in checks:
-        if any(pattern.search(sentence) for pattern in patterns):
+    for pattern, kind in _CHECKS:
+        if pattern.search(sentence):
             return kind
     return None
 
 
 def _importance_for_sentence(sentence: str) -> int:
-    lowered = sentence.lower()
-    if "always" in lowered or "never" in lowered or "must" in lowered:
-        return 5
-    if "should" in lowered:
+    # Strongest cue wins regardless of position, so collect tiers rather than taking the
+    # first match.
+    found: set[int] = set()
+    for match in IMPORTANCE_RE.finditer(sentence):
+        rank = IMPORTANCE_RANK[match.group().lower()]
+        if rank == 5:
+            return 5
+        found.add(rank)
+    if 4 in found:
         return 4
-    if "maybe" in lowered or "optional" in lowered:
+    if 2 in found:
         return 2
     return 3
 
 
+def _load_openai() -> Any:
+    global _openai, _openai_tried
+    if not _openai_tried:
+        _openai_tried = True
+        try:
+            import openai  # type: ignore
+
+            _openai = openai
+        except Exception:
+            _openai = None
+    return _openai
+
+
 def _try_remote_extract(turn: TurnEvent, settings: Settings) -> list[MemoryCandidate] | None:
-    try:
-        import openai  # type: ignore
-    except Exception:
+    openai = _load_openai()
+    if openai is None:
         return None
     client = openai.OpenAI()
     truncated_assistant = turn.assistant_message.content[: settings.max_remote_chars]
@@ -1,38 +1,62 @@
 from __future__ import annotations
 
+import atexit
 import logging
 import sys
 import time
+from collections import defaultdict
 from importlib import metadata
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import Iterable, Sequence
 
 from fastmcp.exceptions import ToolError  # type: ignore
 from fastmcp.server import FastMCP  # type: ignore
 
-from codex_mem.config import Settings, log_level_from_env
+from codex_mem.config import Settings, get_settings, log_level_from_env
 from codex_mem.models import MemoryCandidate, MemoryKind
 from codex_mem.paths import detect_project_root, ensure_mcp_dir, mcp_log_path
 from codex_mem.store import Store
 
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import sqlite3
+    from collections.abc import Iterable, Sequence
+
 mcp = FastMCP("codex-mem")
 _store: Store | None = None
 _settings: Settings | None = None
 logger = logging.getLogger("codex_mem.mcp_server")
 _logging_configured = False
 _log_file: Path | None = None
+_logging_key: tuple[int, Path] | None = None
 _configured_handlers: list[logging.Handler] = []
+_log_dir_ready: Path | None = None
+# Shared by the console and file handlers; built once rather than on every setup_logging().
+_FORMATTER = logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+_FORMATTER.converter = time.gmtime
+_KIND_BY_VALUE: dict[str, MemoryKind] = {kind.value: kind for kind in MemoryKind}
+_atexit_registered = False
 
 
 def _get_store() -> tuple[Store, Settings]:
-    global _store, _settings
+    global _store, _settings, _atexit_registered
     if _store is None or _settings is None:
-        _settings = Settings.from_env()
+        _settings = get_settings()
         _store = Store(_settings)
+        if not _atexit_registered:
+            atexit.register(_close_store)
+            _atexit_registered = True
     return _store, _settings
 
 
+def _close_store() -> None:
+    global _store, _settings
+    if _store is not None:
+        _store.close()
+    _store = None
+    _settings = None
+
+
 def _clear_configured_handlers() -> None:
     """Remove handlers we attached to the root logger."""
     global _configured_handlers
@@ -48,41 +72,42 @@ def _clear_configured_handlers() -> None:
 
 def setup_logging(force: bool = False) -> Path | None:
     """Configure console + rotating file logging with UTC timestamps."""
-    global _logging_configured, _log_file
-    if _logging_configured and not force:
+    global _logging_configured, _log_file, _logging_key, _log_dir_ready
+    log_level = log_level_from_env()
+    log_path = mcp_log_path()
+    # Only rebuild handlers (mkdir + file open) when the level or target actually changed.
+    if not force and _logging_key == (log_level, log_path) and _logging_alive():
         return _log_file
 
-    if force:
-        _clear_configured_handlers()
-        _logging_configured = False
-        _log_file = None
+    _clear_configured_handlers()
+    _logging_configured = False
+    _log_file = None
+    _logging_key = (log_level, log_path)
 
-    log_level = log_level_from_env()
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
     logger.setLevel(log_level)
-    formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
-    formatter.converter = time.gmtime
-
     stream_handler = logging.StreamHandler(sys.stderr)
     stream_handler.setLevel(log_level)
-    stream_handler.setFormatter(formatter)
+    stream_handler.setFormatter(_FORMATTER)
     root_logger.addHandler(stream_handler)
     _configured_handlers.append(stream_handler)
 
-    log_path = mcp_log_path()
     try:
-        ensure_mcp_dir()
+        # Forced reconfigures of the same target skip the mkdir; only a new directory needs it.
+        if _log_dir_ready != log_path.parent:
+            _log_dir_ready = ensure_mcp_dir()
         file_handler = RotatingFileHandler(
             log_path, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8"
         )
         file_handler.setLevel(log_level)
-        file_handler.setFormatter(formatter)
+        file_handler.setFormatter(_FORMATTER)
         root_logger.addHandler(file_handler)
         _configured_handlers.append(file_handler)
         _log_file = log_path
     except Exception as exc:
         _log_file = None
+        _log_dir_ready = None
         logger.warning(
             "Failed to set up file logging at %s: %s; continuing with console only",
             log_path,
@@ -95,10 +120,23 @@ def setup_logging(force: bool = False) -> Path | None:
 
 def _reset_logging_for_tests() -> None:
     """Reset logging state so tests can reconfigure cleanly."""
-    global _logging_configured, _log_file
+    global _logging_configured, _log_file, _logging_key, _log_dir_ready
     _clear_configured_handlers()
     _logging_configured = False
     _log_file = None
+    _logging_key = None
+    _log_dir_ready = None
+
+
+def _logging_alive() -> bool:
+    """True when our handlers are still attached to the root logger and open."""
+    if not _logging_configured or not _configured_handlers:
+        return False
+    root_handlers = logging.getLogger().handlers
+    return all(
+        handler in root_handlers and not _handler_is_closed(handler)
+        for handler in _configured_handlers
+    )
 
 
 def _handler_is_closed(handler: logging.Handler) -> bool:
@@ -138,29 +176,23 @@ def _print_help() -> None:
 def _parse_kinds(kinds: Sequence[str] | None) -> list[MemoryKind] | None:
     if not kinds:
         return None
-    parsed: list[MemoryKind] = []
-    for kind in kinds:
-        try:
-            parsed.append(MemoryKind(kind))
-        except ValueError:
-            continue
-    return parsed
+    return [_KIND_BY_VALUE[kind] for kind in kinds if kind in _KIND_BY_VALUE] or None
 
 
 def _project_root_from_cwd(cwd: str, settings: Settings) -> Path | None:
     return detect_project_root(Path(cwd), settings.root_markers)
 
 
-def _format_context_pack(rows: Iterable[dict]) -> str:
-    by_kind: dict[str, list[dict]] = {}
+def _format_context_pack(rows: Iterable[sqlite3.Row]) -> str:
+    # Group pre-formatted lines rather than rows so each row is read exactly once.
+    by_kind: defaultdict[str, list[str]] = defaultdict(list)
     for row in rows:
-        by_kind.setdefault(row["kind"], []).append(row)
+        prefix = "[pinned]" if row["is_pinned"] else ""
+        by_kind[row["kind"]].append(f"- {prefix}[id:{row['id']}] {row['text']}")
     lines = ["### Relevant memories"]
     for kind, items in by_kind.items():
         lines.append(f"#### {kind}")
-        for item in items:
-            prefix = "[pinned]" if item["is_pinned"] else ""
-            lines.append(f"- {prefix}[id:{item['id']}] {item['text']}")
+        lines.extend(items)
     return "\n".join(lines)
 
 
@@ -178,6 +210,7 @@ def _package_version() -> str:
         return "unknown"
 
 
+@mcp.tool()
 def mem_recall(
     prompt: str,
     cwd: str,
@@ -190,7 +223,7 @@ def mem_recall(
     store, settings = _get_store()
     project_root = _project_root_from_cwd(cwd, settings)
     parsed_kinds = _parse_kinds(kinds)
-    rows = store.search(
+    rows = store.search_rows(
         query=prompt,
         project_root=project_root,
         limit=min(limit, settings.max_recall_items),
@@ -203,6 +236,7 @@ def mem_recall(
     return _format_context_pack(rows)
 
 
+@mcp.tool()
 def mem_search(
     query: str,
     cwd: str | None = None,
@@ -224,6 +258,7 @@ def mem_search(
     )
 
 
+@mcp.tool()
 def mem_add(
     text: str,
     kind: str = "fact",
@@ -234,10 +269,9 @@ def mem_add(
 ) -> dict:
     """Add a memory."""
     store, settings = _get_store()
-    try:
-        mem_kind = MemoryKind(kind)
-    except ValueError as exc:
-        raise ToolError(f"Unknown kind: {kind}") from exc
+    mem_kind = _KIND_BY_VALUE.get(kind)
+    if mem_kind is None:
+        raise ToolError(f"Unknown kind: {kind}")
 
     project_root = _project_root_from_cwd(cwd, settings) if project_scoped and cwd else None
     candidate = MemoryCandidate(
@@ -247,6 +281,7 @@ def mem_add(
     return {"id": mem_id}
 
 
+@mcp.tool()
 def mem_forget(memory_id: int) -> dict:
     """Soft delete a memory."""
     store, _ = _get_store()
@@ -254,6 +289,7 @@ def mem_forget(memory_id: int) -> dict:
     return {"ok": ok}
 
 
+@mcp.tool()
 def mem_update(
     memory_id: int,
     text: str | None = None,
@@ -269,6 +305,7 @@ def mem_update(
     return {"ok": ok}
 
 
+@mcp.tool()
 def mem_stats() -> dict:
     """Return counts and db path."""
     store, _ = _get_store()
@@ -279,11 +316,10 @@ def run(transport: str = "stdio") -> None:
     if _wants_help(sys.argv[1:]):
         _print_help()
         return
-    log_file = setup_logging(force=True)
-    store = None
+    _prune_closed_handlers()
+    log_file = setup_logging()
     try:
-        store, settings = _get_store()
-        _register_tools()
+        _, settings = _get_store()
         logger.info(
             "codex-mem starting transport=%s level=%s log_file=%s cwd=%s version=%s "
             "host=%s port=%s remote_enabled=%s spool_enabled=%s",
@@ -302,11 +338,7 @@ def run(transport: str = "stdio") -> None:
         logger.exception("codex-mem encountered a fatal error")
         raise
     finally:
-        global _store, _settings
-        if store:
-            store.close()
-        _store = None
-        _settings = None
+        # The store stays open for later run() calls; _close_store runs at exit.
         # stdio transport can close streams before shutdown logging runs.
         _prune_closed_handlers()
         if transport != "stdio" or not _stdio_closed():
@@ -318,10 +350,5 @@ def run(transport: str = "stdio") -> None:
                 logging.raiseExceptions = prev_raise
 
 
-def _register_tools() -> None:
-    for func in (mem_recall, mem_search, mem_add, mem_forget, mem_update, mem_stats):
-        mcp.tool()(func)
-
-
 if __name__ == "__main__":  # pragma: no cover
     run()
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import hashlib
-import json
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
@@ -53,8 +52,11 @@ class TurnEvent(BaseModel):
             Message(**_coerce_message(item, default_role="user")) for item in raw_inputs
         ]
 
-        last_assistant = payload.get("last-assistant-message") or payload.get(
-            "last_assistant_message"
+        # assistant_message is the key in spooled TurnEvent dumps (see notify.ingest_event).
+        last_assistant = (
+            payload.get("last-assistant-message")
+            or payload.get("last_assistant_message")
+            or payload.get("assistant_message")
         )
         if last_assistant is None:
             raise ValueError("missing last assistant message in notify payload")
@@ -71,19 +73,24 @@ class TurnEvent(BaseModel):
         )
 
     def content_hash(self) -> str:
-        normalized_inputs = [m.content.strip() for m in self.input_messages]
-        parts = [
-            self.thread_id.strip(),
-            self.turn_id.strip(),
-            self.cwd.strip(),
-            self.assistant_message.content.strip(),
-            json.dumps(normalized_inputs, ensure_ascii=False),
-        ]
-        joined = "|".join(parts)
-        return hashlib.sha256(joined.encode("utf-8")).hexdigest()
-
-
-@dataclass
+        # Feed fields straight into the hasher; control-character separators keep field
+        # boundaries unambiguous without building (and JSON-encoding) one joined string.
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (
+            self.thread_id,
+            self.turn_id,
+            self.cwd,
+            self.assistant_message.content,
+        ):
+            digest.update(part.strip().encode("utf-8"))
+            digest.update(b"\x1f")
+        for message in self.input_messages:
+            digest.update(b"\x1e")
+            digest.update(message.content.strip().encode("utf-8"))
+        return digest.hexdigest()
+
+
+@dataclass(slots=True)
 class MemoryCandidate:
     kind: MemoryKind
     text: str
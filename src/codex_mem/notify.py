@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import fnmatch
 import json
 import logging
+import os
+import re
 import sqlite3
 import sys
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
-from codex_mem.config import Settings
+from codex_mem.config import Settings, get_settings
 from codex_mem.extractor import extract_memories
 from codex_mem.models import TurnEvent
 from codex_mem.paths import detect_project_root, log_path
@@ -16,16 +20,22 @@ from codex_mem.spool import append as spool_append
 from codex_mem.store import Store
 
 logger = logging.getLogger("codex_mem.notify")
+_logging_configured = False
 
 
 def configure_logging() -> None:
+    global _logging_configured
+    if _logging_configured:
+        return
     log_file = log_path()
     log_file.parent.mkdir(parents=True, exist_ok=True)
-    handler = logging.FileHandler(log_file, encoding="utf-8")
+    # delay=True: most ingests log nothing, so don't open the file until a record arrives.
+    handler = logging.FileHandler(log_file, encoding="utf-8", delay=True)
     formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
     handler.setFormatter(formatter)
     logger.setLevel(logging.INFO)
     logger.addHandler(handler)
+    _logging_configured = True
 
 
 def ingest_event(payload: dict[str, Any], settings: Settings, store: Store) -> bool:
@@ -39,56 +49,55 @@ def ingest_event(payload: dict[str, Any], settings: Settings, store: Store) -> b
 
     content_hash = turn.content_hash()
     try:
-        turn_id = store.insert_turn(turn, project_root, content_hash)
+        if store.has_turn(content_hash):
+            logger.info("deduped turn %s/%s", turn.thread_id, turn.turn_id)
+            return True
+        # Extract before taking the write lock: remote extraction is a network round trip,
+        # and other notify hooks and the MCP server must not wait on it.
+        candidates = extract_memories(turn, settings)
+        # One transaction per turn: a failure rolls back the turn row too, so the spooled
+        # payload replays cleanly instead of being deduped against a half-written turn.
+        with store.transaction():
+            turn_id = store.insert_turn(turn, project_root, content_hash)
+            if turn_id is None:
+                logger.info("deduped turn %s/%s", turn.thread_id, turn.turn_id)
+                return True
+            store.add_memories(candidates, project_root, turn_id)
     except sqlite3.OperationalError as exc:
         logger.warning("DB write failed, spooling: %s", exc)
         if settings.spool_enabled:
             spool_append({"payload": turn.model_dump(mode="json")})
         return False
-
-    if turn_id is None:
-        logger.info("deduped turn %s/%s", turn.thread_id, turn.turn_id)
-        return True
-
-    candidates = extract_memories(turn, settings)
-    for candidate in candidates:
-        try:
-            store.add_memory(candidate, project_root, turn_id)
-        except sqlite3.OperationalError as exc:
-            logger.warning("memory insert failed, spooling: %s", exc)
-            if settings.spool_enabled:
-                spool_append({"payload": turn.model_dump(mode="json")})
-            return False
     return True
 
 
 def _redact_turn(turn: TurnEvent, settings: Settings) -> TurnEvent:
-    redacted_inputs = [
-        msg.model_copy(update={"content": redact_text(msg.content, settings.extra_redact_patterns)})
-        for msg in turn.input_messages
-    ]
-    redacted_assistant = turn.assistant_message.model_copy(
-        update={
-            "content": redact_text(turn.assistant_message.content, settings.extra_redact_patterns)
-        }
-    )
-    return turn.model_copy(
-        update={"input_messages": redacted_inputs, "assistant_message": redacted_assistant}
-    )
+    """Redact message contents in place; the turn is freshly parsed and owned by the caller."""
+    patterns = settings.extra_redact_patterns
+    for msg in (*turn.input_messages, turn.assistant_message):
+        msg.content = redact_text(msg.content, patterns)
+    return turn
 
 
 def _is_allowed(cwd: Path, settings: Settings) -> bool:
-    from fnmatch import fnmatch
-
+    cwd_str = os.path.normcase(str(cwd))
     if settings.allow_globs:
-        if not any(fnmatch(str(cwd), pattern) for pattern in settings.allow_globs):
+        allow = _compile_globs(tuple(settings.allow_globs))
+        if not any(pattern.match(cwd_str) for pattern in allow):
             return False
     if settings.deny_globs:
-        if any(fnmatch(str(cwd), pattern) for pattern in settings.deny_globs):
+        deny = _compile_globs(tuple(settings.deny_globs))
+        if any(pattern.match(cwd_str) for pattern in deny):
             return False
     return True
 
 
+@lru_cache(maxsize=32)
+def _compile_globs(globs: tuple[str, ...]) -> tuple[re.Pattern[str], ...]:
+    """Translate fnmatch globs once; matching mirrors fnmatch.fnmatch (normcase both sides)."""
+    return tuple(re.compile(fnmatch.translate(os.path.normcase(glob))) for glob in globs)
+
+
 def main(argv: list[str] | None = None) -> int:
     argv = argv if argv is not None else sys.argv[1:]
     if not argv:
@@ -101,7 +110,7 @@ def main(argv: list[str] | None = None) -> int:
         logger.error("invalid JSON payload")
         return 1
 
-    settings = Settings.from_env()
+    settings = get_settings()
     store = Store(settings)
     try:
         ok = ingest_event(payload, settings, store)
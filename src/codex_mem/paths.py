@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 from typing import Iterable
 
@@ -59,9 +60,29 @@ def ensure_mcp_dir() -> Path:
     return base
 
 
+# Sessions hit the same few cwds over and over; skip the upward stat walk on repeats.
+_ROOT_CACHE_MAX = 1024
+_root_cache: dict[tuple[str, tuple[str, ...]], Path] = {}
+
+
 def detect_project_root(cwd: Path, markers: Iterable[str]) -> Path | None:
     """Walk upward from cwd to find a directory containing any marker file/dir."""
-    current = cwd.resolve()
+    # abspath is pure string work, so relative cwds still key correctly without a syscall.
+    key = (os.path.abspath(cwd), tuple(markers))
+    root = _root_cache.get(key)
+    if root is None:
+        root = _find_project_root(*key)
+        # Only hits are cached: a cwd without a marker may gain one (git init) while a
+        # long-running server is up, and must not stay global until restart.
+        if root is not None:
+            if len(_root_cache) >= _ROOT_CACHE_MAX:
+                del _root_cache[next(iter(_root_cache))]
+            _root_cache[key] = root
+    return root
+
+
+def _find_project_root(cwd: str, markers: tuple[str, ...]) -> Path | None:
+    current = Path(cwd).resolve()
     for parent in [current, *current.parents]:
         for marker in markers:
             if (parent / marker).exists():
@@ -70,8 +91,6 @@ def detect_project_root(cwd: Path, markers: Iterable[str]) -> Path | None:
 
 
 def getenv_path(key: str) -> Path | None:
-    import os
-
     value = os.environ.get(key)
     if value:
         return Path(value).expanduser()
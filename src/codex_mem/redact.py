@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable, Pattern, Tuple
+from functools import lru_cache
+from typing import Any, Iterable, Pattern, Tuple
 
 PatternSpec = Tuple[str, Pattern[str]]
 
@@ -22,9 +23,67 @@ DEFAULT_PATTERNS: tuple[PatternSpec, ...] = (
         ),
     ),
     ("SLACK", re.compile(r"xox[baprs]-[A-Za-z0-9\-]{10,48}")),
-    ("JWT", re.compile(r"[A-Za-z0-9\-_]{20,}\.[A-Za-z0-9\-_]{10,}\.[A-Za-z0-9\-_]{10,}")),
+    # JWT headers are base64url JSON, so they always open with "eyJ" ('{"'). Anchoring on it
+    # stops the pattern from matching any dotted identifier and from retrying every offset
+    # of long dotted runs. No word boundary: tokens glued to text (token%3DeyJ...,
+    # id_token_eyJ...) must still be caught.
+    ("JWT", re.compile(r"eyJ[A-Za-z0-9\-_]{17,}\.[A-Za-z0-9\-_]{10,}\.[A-Za-z0-9\-_]{10,}")),
 )
 
+# All built-ins fused into one alternation: a single scan tells us whether any secret is
+# present. It is only a detector; substitution still runs pattern by pattern, because a
+# fused sub lets an earlier match (e.g. JWT) swallow the prefix of a later one (PEM).
+_DEFAULT_RE = re.compile("|".join(f"(?:{pattern.pattern})" for _, pattern in DEFAULT_PATTERNS))
+
+# Literal substrings at least one of which every built-in requires.
+_ANCHORS = ("sk-", "gh", "AKIA", "Bearer ", "-----BEGIN ", "xox", "eyJ")
+
+
+def _may_contain_default_secret(text: str) -> bool:
+    return any(anchor in text for anchor in _ANCHORS)
+
+
+# Optional Hyperscan database for the same detection scan (pip install codex-mem[fast]).
+_hyperscan: Any = None
+_hyperscan_db: Any = None
+_hyperscan_tried = False
+
+
+def _load_hyperscan_db() -> Any:
+    global _hyperscan, _hyperscan_db, _hyperscan_tried
+    if not _hyperscan_tried:
+        _hyperscan_tried = True
+        try:
+            import hyperscan  # type: ignore
+
+            db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            db.compile(
+                expressions=[pattern.pattern.encode() for _, pattern in DEFAULT_PATTERNS],
+                ids=list(range(len(DEFAULT_PATTERNS))),
+                flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(DEFAULT_PATTERNS),
+            )
+            _hyperscan, _hyperscan_db = hyperscan, db
+        except Exception:
+            _hyperscan_db = None
+    return _hyperscan_db
+
+
+def _stop_scan(*_args: Any) -> bool:
+    return True
+
+
+def _has_default_secret(text: str) -> bool:
+    db = _load_hyperscan_db()
+    if db is not None:
+        try:
+            db.scan(text.encode("utf-8"), match_event_handler=_stop_scan)
+            return False
+        except _hyperscan.ScanTerminated:
+            return True
+        except Exception:
+            pass  # e.g. unencodable text or scratch in use; the re scan below is exact
+    return _DEFAULT_RE.search(text) is not None
+
 
 def compile_extra_patterns(extra: Iterable[str]) -> list[PatternSpec]:
     compiled: list[PatternSpec] = []
@@ -36,13 +95,18 @@ def compile_extra_patterns(extra: Iterable[str]) -> list[PatternSpec]:
     return compiled
 
 
+@lru_cache(maxsize=32)
+def _compiled_extras(extra: tuple[str, ...]) -> tuple[PatternSpec, ...]:
+    return tuple(compile_extra_patterns(extra))
+
+
 def redact_text(text: str, extra_patterns: Iterable[str] | None = None) -> str:
     """Redact secrets in text."""
-    patterns: list[PatternSpec] = list(DEFAULT_PATTERNS)
-    if extra_patterns:
-        patterns.extend(compile_extra_patterns(extra_patterns))
-
     redacted = text
-    for name, pattern in patterns:
-        redacted = pattern.sub(f"[REDACTED:{name}]", redacted)
+    if _may_contain_default_secret(text) and _has_default_secret(text):
+        for name, pattern in DEFAULT_PATTERNS:
+            redacted = pattern.sub(f"[REDACTED:{name}]", redacted)
+    if extra_patterns:
+        for name, pattern in _compiled_extras(tuple(extra_patterns)):
+            redacted = pattern.sub(f"[REDACTED:{name}]", redacted)
     return redacted
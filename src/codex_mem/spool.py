@@ -1,18 +1,44 @@
 from __future__ import annotations
 
+import atexit
 import json
+import os
 from pathlib import Path
 from typing import Any, Iterable
 
+from codex_mem import jsonutil
 from codex_mem.paths import ensure_base_dir, spool_path
 
+# Several notify processes may spool at once, so every entry goes out as a single write(2)
+# on an O_APPEND descriptor; the kernel then keeps lines whole. The descriptor stays open
+# across calls (spooling comes in bursts while the DB is locked) and is closed on clear/exit.
+_fd: int | None = None
+_fd_path: Path | None = None
+_atexit_registered = False
+
 
 def append(payload: dict[str, Any]) -> None:
-    ensure_base_dir()
+    global _fd, _fd_path, _atexit_registered
     path = spool_path()
-    with path.open("a", encoding="utf-8") as fp:
-        fp.write(json.dumps(payload))
-        fp.write("\n")
+    if _fd is None or _fd_path != path:
+        close()
+        ensure_base_dir()
+        _fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        _fd_path = path
+        if not _atexit_registered:
+            atexit.register(close)
+            _atexit_registered = True
+    data = memoryview(jsonutil.dumps_bytes(payload) + b"\n")
+    while data:
+        data = data[os.write(_fd, data) :]
+
+
+def close() -> None:
+    global _fd, _fd_path
+    if _fd is not None:
+        os.close(_fd)
+    _fd = None
+    _fd_path = None
 
 
 def read_all(path: Path | None = None) -> list[dict[str, Any]]:
@@ -20,19 +46,38 @@ def read_all(path: Path | None = None) -> list[dict[str, Any]]:
     if not target.exists():
         return []
     entries: list[dict[str, Any]] = []
-    with target.open("r", encoding="utf-8") as fp:
+    with target.open("rb") as fp:
         for line in fp:
             line = line.strip()
             if not line:
                 continue
             try:
-                entries.append(json.loads(line))
-            except json.JSONDecodeError:
+                entries.append(jsonutil.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
                 continue
     return entries
 
 
+def claim(path: Path | None = None) -> Path | None:
+    """Atomically move the spool aside for replay; later appends start a fresh spool.
+
+    A claimed file left over from an interrupted replay is returned as-is so it gets replayed
+    first; the live spool is claimed on the next run.
+    """
+    close()
+    target = path or spool_path()
+    claimed = target.with_name(target.name + ".reconciling")
+    if claimed.exists():
+        return claimed
+    try:
+        os.replace(target, claimed)
+    except FileNotFoundError:
+        return None
+    return claimed
+
+
 def clear(path: Path | None = None) -> None:
+    close()
     target = path or spool_path()
     if target.exists():
         target.unlink()
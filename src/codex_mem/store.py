@@ -1,32 +1,115 @@
 from __future__ import annotations
 
-import json
+import re
 import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import replace
 from datetime import datetime, timezone
-from difflib import SequenceMatcher
 from pathlib import Path
-from typing import Sequence
+from typing import Iterator, Sequence
 
+from codex_mem import jsonutil
 from codex_mem.config import Settings
 from codex_mem.models import MemoryCandidate, MemoryKind, TurnEvent
 from codex_mem.paths import db_path, ensure_base_dir
 
 
 class Store:
+    # Kept as constants so every call hands sqlite3 the same SQL string and hits the
+    # connection's statement cache instead of re-preparing.
+    _INSERT_TURN_SQL = """
+        INSERT INTO turns (
+            thread_id, turn_id, ts_utc, cwd, project_root, input_messages_json,
+            assistant_message, assistant_message_json, surface, hash
+        )
+        VALUES (:thread_id, :turn_id, :ts_utc, :cwd, :project_root, :input_messages_json,
+                :assistant_message, :assistant_message_json, :surface, :hash)
+    """
+    _INSERT_MEMORY_SQL = """
+        INSERT INTO memories (
+            ts_utc, project_root, kind, text, source_turn_id, importance, tags_json
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    _MERGE_CANDIDATES_SQL = """
+        SELECT id, text FROM memories
+        WHERE is_deleted = 0
+          AND kind = ?
+          AND project_root IS ?
+        ORDER BY ts_utc DESC
+        LIMIT 8
+    """
+    _FTS_INSERT_SQL = "INSERT INTO memory_fts(rowid, text, project_root, kind) VALUES (?, ?, ?, ?)"
+    _FTS_DELETE_SQL = """
+        INSERT INTO memory_fts(memory_fts, rowid, text, project_root, kind)
+        VALUES ('delete', ?, ?, ?, ?)
+    """
+
     def __init__(self, settings: Settings):
         self.settings = settings
-        ensure_base_dir()
-        self.conn = sqlite3.connect(db_path(), check_same_thread=False)
+        self.db_target = settings.db_uri or str(db_path())
+        if settings.db_uri is None:
+            ensure_base_dir()
+        # uri=True only changes how "file:..." targets are parsed; plain paths and ":memory:"
+        # open as before.
+        self.conn = sqlite3.connect(self.db_target, uri=True, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        self._batch_depth = 0
         self._init_db()
 
     def close(self) -> None:
         self.conn.close()
 
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group writes into a single commit; nested blocks become savepoints."""
+        depth = self._batch_depth
+        if depth == 0:
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+        else:
+            self.conn.execute(f"SAVEPOINT batch_{depth}")
+        self._batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._batch_depth -= 1
+            if depth == 0:
+                self.conn.rollback()
+            else:
+                self.conn.execute(f"ROLLBACK TO batch_{depth}")
+                self.conn.execute(f"RELEASE batch_{depth}")
+            raise
+        self._batch_depth -= 1
+        if depth == 0:
+            self.conn.commit()
+        else:
+            self.conn.execute(f"RELEASE batch_{depth}")
+
+    def _commit(self) -> None:
+        if self._batch_depth == 0:
+            self.conn.commit()
+
     def _init_db(self) -> None:
         cur = self.conn.cursor()
         cur.execute("PRAGMA journal_mode=WAL;")
         cur.execute("PRAGMA foreign_keys=ON;")
+        # NORMAL is corruption-safe under WAL; it only risks the last commits on power loss.
+        # OFF (fast_pragmas) skips fsync entirely and is meant for throwaway/test databases.
+        if self.settings.durable_writes:
+            synchronous = "FULL"
+        elif self.settings.fast_pragmas:
+            synchronous = "OFF"
+        else:
+            synchronous = "NORMAL"
+        cur.execute(f"PRAGMA synchronous={synchronous};")
+        cur.execute("PRAGMA temp_store=MEMORY;")
+        cur.execute("PRAGMA mmap_size=268435456;")
+        cur.execute("PRAGMA cache_size=-65536;")
+        cur.execute("PRAGMA wal_autocheckpoint=1000;")
+        # Keep dirty pages in the cache until commit so batched writes don't spill mid-transaction.
+        cur.execute("PRAGMA cache_spill=OFF;")
         cur.execute(
             """
             CREATE TABLE IF NOT EXISTS turns (
@@ -61,39 +144,42 @@ class Store:
             );
             """
         )
+        # Partial indexes over live rows: one for the merge lookup (kind + scope, newest first),
+        # one for scoped search ordering.
         cur.execute(
             """
-            CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts
-            USING fts5(text, project_root, kind, content='memories', content_rowid='id');
+            CREATE INDEX IF NOT EXISTS idx_memories_merge
+            ON memories(kind, project_root, ts_utc) WHERE is_deleted = 0;
             """
         )
-        # triggers to keep FTS in sync
         cur.execute(
             """
-            CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
-                INSERT INTO memory_fts(rowid, text, project_root, kind)
-                VALUES (new.id, new.text, new.project_root, new.kind);
-            END;
+            CREATE INDEX IF NOT EXISTS idx_memories_scope
+            ON memories(project_root, is_pinned, importance, ts_utc) WHERE is_deleted = 0;
             """
         )
         cur.execute(
             """
-            CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
-                DELETE FROM memory_fts WHERE rowid = old.id;
-            END;
-            """
-        )
-        cur.execute(
-            """
-            CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE ON memories BEGIN
-                DELETE FROM memory_fts WHERE rowid = old.id;
-                INSERT INTO memory_fts(rowid, text, project_root, kind)
-                VALUES (new.id, new.text, new.project_root, new.kind);
-            END;
+            CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts
+            USING fts5(text, project_root, kind, content='memories', content_rowid='id');
             """
         )
+        # The FTS index used to be kept in sync by triggers (the first generation of which
+        # corrupted the external-content index on update). Writers now maintain it explicitly
+        # in the same transaction, so drop any triggers and rebuild the index once.
+        if cur.execute("PRAGMA user_version").fetchone()[0] < 2:
+            cur.execute("DROP TRIGGER IF EXISTS memories_ai")
+            cur.execute("DROP TRIGGER IF EXISTS memories_ad")
+            cur.execute("DROP TRIGGER IF EXISTS memories_au")
+            cur.execute("INSERT INTO memory_fts(memory_fts) VALUES ('rebuild')")
+            cur.execute("PRAGMA user_version = 2")
         self.conn.commit()
 
+    def has_turn(self, content_hash: str) -> bool:
+        """Cheap dedup probe; insert_turn still enforces uniqueness under the write lock."""
+        row = self.conn.execute("SELECT 1 FROM turns WHERE hash = ?", (content_hash,))
+        return row.fetchone() is not None
+
     def insert_turn(
         self, turn: TurnEvent, project_root: Path | None, content_hash: str
     ) -> int | None:
@@ -104,26 +190,17 @@ class Store:
             "ts_utc": turn.ts_utc.isoformat(),
             "cwd": str(turn.cwd),
             "project_root": str(project_root) if project_root else None,
-            "input_messages_json": json.dumps([msg.model_dump() for msg in turn.input_messages]),
+            "input_messages_json": jsonutil.dumps(
+                [msg.model_dump() for msg in turn.input_messages]
+            ),
             "assistant_message": turn.assistant_message.content,
-            "assistant_message_json": json.dumps(turn.assistant_message.model_dump()),
+            "assistant_message_json": jsonutil.dumps(turn.assistant_message.model_dump()),
             "surface": turn.surface,
             "hash": content_hash,
         }
         try:
-            cur = self.conn.cursor()
-            cur.execute(
-                """
-                INSERT INTO turns (
-                    thread_id, turn_id, ts_utc, cwd, project_root, input_messages_json,
-                    assistant_message, assistant_message_json, surface, hash
-                )
-                VALUES (:thread_id, :turn_id, :ts_utc, :cwd, :project_root, :input_messages_json,
-                        :assistant_message, :assistant_message_json, :surface, :hash)
-                """,
-                payload,
-            )
-            self.conn.commit()
+            cur = self.conn.execute(self._INSERT_TURN_SQL, payload)
+            self._commit()
             return int(cur.lastrowid)
         except sqlite3.IntegrityError:
             return None
@@ -137,57 +214,99 @@ class Store:
         merged_id = self._merge_if_similar(candidate, project_root)
         if merged_id is not None:
             return merged_id
-        cur = self.conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO memories (
-                ts_utc, project_root, kind, text, source_turn_id, importance, tags_json
+        root = str(project_root) if project_root else None
+        text = candidate.text.strip()
+        with self.transaction():
+            cur = self.conn.execute(
+                self._INSERT_MEMORY_SQL,
+                (
+                    datetime.now(timezone.utc).isoformat(),
+                    root,
+                    candidate.kind.value,
+                    text,
+                    source_turn_id,
+                    candidate.importance,
+                    jsonutil.dumps(list(candidate.tags)) if candidate.tags else None,
+                ),
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                datetime.now(timezone.utc).isoformat(),
-                str(project_root) if project_root else None,
-                candidate.kind.value,
-                candidate.text.strip(),
-                source_turn_id,
-                candidate.importance,
-                json.dumps(list(candidate.tags)) if candidate.tags else None,
-            ),
-        )
-        self.conn.commit()
-        return int(cur.lastrowid)
+            mem_id = int(cur.lastrowid)
+            self.conn.execute(self._FTS_INSERT_SQL, (mem_id, text, root, candidate.kind.value))
+        return mem_id
+
+    def add_memories(
+        self,
+        candidates: Sequence[MemoryCandidate],
+        project_root: Path | None,
+        source_turn_id: int | None = None,
+    ) -> int:
+        """Merge or insert a batch of candidates; return how many new rows were written."""
+        pending: list[MemoryCandidate] = []
+        for candidate in candidates:
+            if self._merge_if_similar(candidate, project_root) is not None:
+                continue
+            # Candidates from the same batch are not in the table yet, so merge among them too.
+            shingles = _shingles(candidate.text)
+            for idx, other in enumerate(pending):
+                if other.kind is candidate.kind and _is_similar(
+                    shingles, _shingles(other.text), self.settings.merge_threshold
+                ):
+                    pending[idx] = replace(other, text=_merge_text(other.text, candidate.text))
+                    break
+            else:
+                pending.append(candidate)
+        if not pending:
+            return 0
+        ts_utc = datetime.now(timezone.utc).isoformat()
+        root = str(project_root) if project_root else None
+        with self.transaction():
+            # New rowids are allocated above the current max, so this bounds the batch.
+            last_id = self.conn.execute("SELECT IFNULL(MAX(id), 0) FROM memories").fetchone()[0]
+            self.conn.executemany(
+                self._INSERT_MEMORY_SQL,
+                [
+                    (
+                        ts_utc,
+                        root,
+                        candidate.kind.value,
+                        candidate.text.strip(),
+                        source_turn_id,
+                        candidate.importance,
+                        jsonutil.dumps(list(candidate.tags)) if candidate.tags else None,
+                    )
+                    for candidate in pending
+                ],
+            )
+            self.conn.execute(
+                """
+                INSERT INTO memory_fts(rowid, text, project_root, kind)
+                SELECT id, text, project_root, kind FROM memories WHERE id > ?
+                """,
+                (last_id,),
+            )
+        return len(pending)
 
     def _merge_if_similar(
         self, candidate: MemoryCandidate, project_root: Path | None
     ) -> int | None:
-        cur = self.conn.cursor()
-        cur.execute(
-            """
-            SELECT id, text FROM memories
-            WHERE is_deleted = 0
-              AND kind = ?
-              AND (project_root = ? OR (project_root IS NULL AND ? IS NULL))
-            ORDER BY ts_utc DESC
-            LIMIT 8
-            """,
-            (
-                candidate.kind.value,
-                str(project_root) if project_root else None,
-                str(project_root) if project_root else None,
-            ),
-        )
-        rows = cur.fetchall()
+        root = str(project_root) if project_root else None
+        kind = candidate.kind.value
+        rows = self.conn.execute(self._MERGE_CANDIDATES_SQL, (kind, root)).fetchall()
+        candidate_shingles = _shingles(candidate.text)
         for row in rows:
-            ratio = SequenceMatcher(None, candidate.text.lower(), row["text"].lower()).ratio()
-            if ratio >= self.settings.merge_threshold:
+            if _is_similar(
+                candidate_shingles, _shingles(row["text"]), self.settings.merge_threshold
+            ):
+                mem_id = int(row["id"])
                 merged_text = _merge_text(row["text"], candidate.text)
-                cur.execute(
-                    "UPDATE memories SET text = ?, ts_utc = ? WHERE id = ?",
-                    (merged_text, datetime.now(timezone.utc).isoformat(), row["id"]),
-                )
-                self.conn.commit()
-                return int(row["id"])
+                with self.transaction():
+                    self.conn.execute(
+                        "UPDATE memories SET text = ?, ts_utc = ? WHERE id = ?",
+                        (merged_text, datetime.now(timezone.utc).isoformat(), mem_id),
+                    )
+                    if merged_text != row["text"]:
+                        self.conn.execute(self._FTS_DELETE_SQL, (mem_id, row["text"], root, kind))
+                        self.conn.execute(self._FTS_INSERT_SQL, (mem_id, merged_text, root, kind))
+                return mem_id
         return None
 
     def search(
@@ -199,18 +318,20 @@ class Store:
         kinds: Sequence[MemoryKind] | None = None,
         tags: Sequence[str] | None = None,
     ) -> list[dict]:
-        where_parts: list[str] = ["m.is_deleted = 0"]
-        params: list[str | int | None] = []
-
-        if project_root is not None:
-            scope_clauses = ["m.project_root = ?"]
-            params.append(str(project_root))
-            if include_global:
-                scope_clauses.append("m.project_root IS NULL")
-            where_parts.append("(" + " OR ".join(scope_clauses) + ")")
-        else:
-            if not include_global:
-                where_parts.append("m.project_root IS NOT NULL")
+        rows = self.search_rows(query, project_root, limit, include_global, kinds, tags)
+        return [dict(row) for row in rows]
+
+    def search_rows(
+        self,
+        query: str,
+        project_root: Path | None,
+        limit: int,
+        include_global: bool = True,
+        kinds: Sequence[MemoryKind] | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> list[sqlite3.Row]:
+        """Like search() but returns the raw sqlite3.Row objects (no dict copies)."""
+        where_parts, params = _scope_filter(project_root, include_global)
 
         if kinds:
             kind_placeholders = ",".join("?" for _ in kinds)
@@ -246,15 +367,36 @@ class Store:
             sql = base_sql.format(where_clause=where_clause)
             params = params + [limit]
 
-        cur = self.conn.cursor()
-        cur.execute(sql, params)
-        rows = [dict(row) for row in cur.fetchall()]
-        return _filter_by_tags(rows, tags)
+        return _filter_by_tags(self.conn.execute(sql, params).fetchall(), tags)
+
+    def iter_all(
+        self,
+        project_root: Path | None,
+        include_global: bool = True,
+        batch: int = 500,
+    ) -> Iterator[dict]:
+        """Yield every live memory in id order, paging with a keyset cursor on id."""
+        where_parts, params = _scope_filter(project_root, include_global)
+        sql = f"""
+            SELECT m.id, m.ts_utc, m.project_root, m.kind, m.text,
+                   m.importance, m.is_pinned, m.is_deleted, m.tags_json
+            FROM memories m
+            WHERE m.id > ? AND {" AND ".join(where_parts)}
+            ORDER BY m.id
+            LIMIT ?
+        """
+        last_id = 0
+        while True:
+            rows = self.conn.execute(sql, [last_id, *params, batch]).fetchall()
+            for row in rows:
+                yield dict(row)
+            if len(rows) < batch:
+                return
+            last_id = rows[-1]["id"]
 
     def soft_delete(self, memory_id: int) -> bool:
-        cur = self.conn.cursor()
-        cur.execute("UPDATE memories SET is_deleted = 1 WHERE id = ?", (memory_id,))
-        self.conn.commit()
+        cur = self.conn.execute("UPDATE memories SET is_deleted = 1 WHERE id = ?", (memory_id,))
+        self._commit()
         return cur.rowcount > 0
 
     def update_memory(
@@ -278,14 +420,27 @@ class Store:
             params.append(1 if is_pinned else 0)
         if tags is not None:
             parts.append("tags_json = ?")
-            params.append(json.dumps(list(tags)))
+            params.append(jsonutil.dumps(list(tags)))
         if not parts:
             return False
         params.append(memory_id)
         sql = f"UPDATE memories SET {', '.join(parts)} WHERE id = ?"
-        cur = self.conn.cursor()
-        cur.execute(sql, params)
-        self.conn.commit()
+        with self.transaction():
+            old = None
+            if text is not None:
+                old = self.conn.execute(
+                    "SELECT text, project_root, kind FROM memories WHERE id = ?", (memory_id,)
+                ).fetchone()
+            cur = self.conn.execute(sql, params)
+            # Only text, project_root and kind are indexed; other columns leave FTS untouched.
+            if old is not None and old["text"] != text:
+                self.conn.execute(
+                    self._FTS_DELETE_SQL,
+                    (memory_id, old["text"], old["project_root"], old["kind"]),
+                )
+                self.conn.execute(
+                    self._FTS_INSERT_SQL, (memory_id, text, old["project_root"], old["kind"])
+                )
         return cur.rowcount > 0
 
     def stats(self) -> dict[str, object]:
@@ -303,11 +458,81 @@ class Store:
         last_row = cur.fetchone()
         last_ingest = last_row["last_ts"] if last_row else None
         return {
-            "db_path": str(db_path()),
+            "db_path": self.db_target,
             "counts": counts,
             "last_ingest": last_ingest,
         }
 
+    def health_check(self, integrity: bool = False) -> dict[str, object]:
+        """Cheap liveness probe; also runs PRAGMA optimize.
+
+        With ``integrity=True`` it adds PRAGMA quick_check, which reads every page of the
+        database (the argument only caps how many errors are reported), so it is opt-in.
+        """
+        started = time.perf_counter()
+        self.conn.execute("SELECT 1 FROM turns LIMIT 1").fetchone()
+        quick_check = None
+        if integrity:
+            quick_check = self.conn.execute("PRAGMA quick_check(1)").fetchone()[0]
+        page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        self.conn.execute("PRAGMA optimize")
+        return {
+            "quick_check": quick_check,
+            "size_bytes": page_count * page_size,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+
+def _scope_filter(
+    project_root: Path | None, include_global: bool
+) -> tuple[list[str], list[str | int | None]]:
+    where_parts: list[str] = ["m.is_deleted = 0"]
+    params: list[str | int | None] = []
+    if project_root is not None:
+        scope_clauses = ["m.project_root = ?"]
+        params.append(str(project_root))
+        if include_global:
+            scope_clauses.append("m.project_root IS NULL")
+        where_parts.append("(" + " OR ".join(scope_clauses) + ")")
+    elif not include_global:
+        where_parts.append("m.project_root IS NOT NULL")
+    return where_parts, params
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _shingles(text: str) -> frozenset[str]:
+    """Character bigrams of the lowercased words, padded so word edges count too."""
+    words = _TOKEN_RE.findall(text.lower())
+    if not words:
+        return frozenset()
+    joined = f" {' '.join(words)} "
+    return frozenset(joined[i : i + 2] for i in range(len(joined) - 1))
+
+
+def _dice(a: frozenset[str], b: frozenset[str]) -> float:
+    """Bigram Dice coefficient; tracks SequenceMatcher.ratio() on near-duplicates in linear time.
+
+    Unlike word-set Jaccard it still scores a one-word edit in a short sentence highly
+    (e.g. "over" -> "to"), and like it, reordered words still score as duplicates.
+    """
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def _is_similar(a: frozenset[str], b: frozenset[str], threshold: float) -> bool:
+    # 2|a & b| / (|a| + |b|) can never exceed 2*min / (min + max) of the set sizes, so
+    # lopsided pairs and disjoint pairs are rejected before building the intersection.
+    if threshold <= 0:
+        return True
+    small, large = sorted((len(a), len(b)))
+    if not small or 2 * small < threshold * (small + large) or a.isdisjoint(b):
+        return False
+    return _dice(a, b) >= threshold
+
 
 def _merge_text(existing: str, new_text: str) -> str:
     if new_text.strip() in existing:
@@ -315,13 +540,13 @@ def _merge_text(existing: str, new_text: str) -> str:
     return existing.strip() + "\n- " + new_text.strip()
 
 
-def _filter_by_tags(rows: list[dict], tags: Sequence[str] | None) -> list[dict]:
+def _filter_by_tags(rows: list[sqlite3.Row], tags: Sequence[str] | None) -> list[sqlite3.Row]:
     if not tags:
         return rows
-    filtered: list[dict] = []
+    filtered: list[sqlite3.Row] = []
     tag_set = set(tags)
     for row in rows:
-        existing = set(json.loads(row["tags_json"])) if row.get("tags_json") else set()
+        existing = set(jsonutil.loads(row["tags_json"])) if row["tags_json"] else set()
         if tag_set.issubset(existing):
             filtered.append(row)
     return filtered
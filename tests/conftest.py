@@ -0,0 +1,35 @@
+import logging
+
+import pytest
+
+from codex_mem.config import get_settings
+
+# Modules that assert on log output or handler setup keep logging enabled.
+_LOGGING_TEST_MODULES = {"test_logging_setup", "test_mcp_logging"}
+
+
+@pytest.fixture(autouse=True)
+def _fast_sqlite(monkeypatch):
+    # Test databases are throwaway, so skip fsync; clear the settings cache so it applies.
+    monkeypatch.setenv("CODEX_MEM_FAST_PRAGMAS", "1")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+def git_project(tmp_path):
+    """A project directory under tmp_path marked as a git root."""
+    project_dir = tmp_path / "proj"
+    (project_dir / ".git").mkdir(parents=True)
+    return project_dir
+
+
+@pytest.fixture(autouse=True)
+def _quiet_logs(request):
+    if request.module.__name__.rpartition(".")[2] in _LOGGING_TEST_MODULES:
+        yield
+        return
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
@@ -0,0 +1,106 @@
+from codex_mem import cli
+
+
+def test_cli_add_and_search(monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv("CODEX_MEM_HOME", str(tmp_path / "memhome-cli"))
+
+    assert cli.app(["add", "We prefer ruff", "--kind", "preference", "--no-project-scoped"]) == 0
+    assert "Added memory id=" in capsys.readouterr().out
+
+    assert cli.app(["search", "ruff"]) == 0
+    assert "(preference) We prefer ruff" in capsys.readouterr().out
+
+    assert cli.app(["add", "x", "--kind", "bogus"]) == 1
+    assert "Unknown kind" in capsys.readouterr().err
+
+
+def test_cli_reconcile_imports_spool(monkeypatch, tmp_path, capsys):
+    from codex_mem.spool import append, spool_path
+
+    monkeypatch.setenv("CODEX_MEM_HOME", str(tmp_path / "memhome-reconcile"))
+    messages = {"1": "We decided to ship sqlite.", "2": "Next: document the export."}
+    for turn_id, message in messages.items():
+        append(
+            {
+                "payload": {
+                    "thread-id": "t1",
+                    "turn-id": turn_id,
+                    "cwd": str(tmp_path),
+                    "input-messages": [message],
+                    "last-assistant-message": "Ok.",
+                }
+            }
+        )
+
+    assert cli.app(["reconcile"]) == 0
+    assert '"success": 2' in capsys.readouterr().out
+    assert not spool_path().exists()
+
+
+def test_cli_reconcile_keeps_turns_spooled_during_replay(monkeypatch, tmp_path, capsys):
+    from codex_mem import notify
+    from codex_mem.spool import append, read_all, spool_path
+
+    monkeypatch.setenv("CODEX_MEM_HOME", str(tmp_path / "memhome-reconcile-live"))
+    append({"payload": {"thread-id": "t1", "turn-id": "s0", "cwd": str(tmp_path)}})
+
+    def ingest_while_notify_spools(payload, settings, store):
+        # A live notify hook that hit the lock and spooled its turn mid-replay.
+        append({"payload": {"thread-id": "t1", "turn-id": "live", "cwd": str(tmp_path)}})
+        return True
+
+    monkeypatch.setattr(notify, "ingest_event", ingest_while_notify_spools)
+    assert cli.app(["reconcile"]) == 0
+    assert '"success": 1' in capsys.readouterr().out
+    assert [entry["payload"]["turn-id"] for entry in read_all()] == ["live"]
+    assert not spool_path().with_name(spool_path().name + ".reconciling").exists()
+
+
+def test_cli_reconcile_replays_turns_spooled_by_ingest(monkeypatch, tmp_path, capsys):
+    import sqlite3
+
+    from codex_mem.config import get_settings
+    from codex_mem.notify import ingest_event
+    from codex_mem.spool import append, spool_path
+    from codex_mem.store import Store
+
+    monkeypatch.setenv("CODEX_MEM_HOME", str(tmp_path / "memhome-reconcile-spooled"))
+    settings = get_settings()
+    store = Store(settings)
+
+    def locked(*_args, **_kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    payload = {
+        "thread-id": "t1",
+        "turn-id": "spooled",
+        "cwd": str(tmp_path),
+        "input-messages": ["We decided to replay spooled turns."],
+        "last-assistant-message": "Ok.",
+    }
+    with monkeypatch.context() as mp:
+        mp.setattr(Store, "insert_turn", locked)
+        assert not ingest_event(payload, settings, store)
+    store.close()
+    # A malformed entry next to it is counted as a failure, not a crash.
+    append({"payload": {"thread-id": "t1", "turn-id": "broken"}})
+
+    assert cli.app(["reconcile"]) == 0
+    assert '{"success": 1, "failures": 1}' in capsys.readouterr().out
+    assert not spool_path().with_name(spool_path().name + ".reconciling").exists()
+
+    store = Store(settings)
+    turn_ids = [row[0] for row in store.conn.execute("SELECT turn_id FROM turns")]
+    store.close()
+    assert turn_ids == ["spooled"]
+
+
+def test_cli_doctor_runs_quick_check_only_on_request(monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("CODEX_MEM_HOME", str(tmp_path / "memhome-doctor"))
+
+    cli.app(["doctor"])
+    assert "quick_check" not in capsys.readouterr().out
+
+    cli.app(["doctor", "--check"])
+    assert "quick_check ok" in capsys.readouterr().out
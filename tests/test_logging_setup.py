@@ -79,5 +79,24 @@ def test_run_writes_startup_and_shutdown_logs(monkeypatch, tmp_path):
         assert "transport=stdio" in content
         assert "codex-mem stopping" in content
         assert ran["called"] is True
+    finally:
+        mcp_server._close_store()
+        mcp_server._reset_logging_for_tests()
+
+
+def test_setup_logging_reuses_handlers_until_env_changes(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("CODEX_MEM_LOG_LEVEL", "info")
+    mcp_server._reset_logging_for_tests()
+    try:
+        mcp_server.setup_logging()
+        handlers = list(mcp_server._configured_handlers)
+        mcp_server.setup_logging()
+        assert mcp_server._configured_handlers == handlers
+
+        monkeypatch.setenv("CODEX_MEM_LOG_LEVEL", "debug")
+        mcp_server.setup_logging()
+        assert mcp_server._configured_handlers != handlers
+        assert logging.getLogger().level == logging.DEBUG
     finally:
         mcp_server._reset_logging_for_tests()
@@ -9,20 +9,24 @@ from codex_mem import mcp_server
 from codex_mem.paths import mcp_log_path
 
 
+@pytest.fixture(scope="module")
+def _handler_baseline():
+    # Root handlers owned by pytest/other modules; snapshotted once, never touched here.
+    return frozenset(map(id, logging.getLogger().handlers))
+
+
 @pytest.fixture(autouse=True)
-def reset_logging_state():
+def reset_logging_state(_handler_baseline):
     root = logging.getLogger()
-    original_handlers = list(root.handlers)
     original_level = root.level
     mcp_server._logging_configured = False
     mcp_server._log_file = None
     yield
-    for handler in list(root.handlers):
-        root.removeHandler(handler)
-        if handler not in original_handlers:
+    # Only handlers the test added need undoing; the baseline ones stay attached.
+    for handler in root.handlers[:]:
+        if id(handler) not in _handler_baseline:
+            root.removeHandler(handler)
             handler.close()
-    for handler in original_handlers:
-        root.addHandler(handler)
     root.setLevel(original_level)
     mcp_server._logging_configured = False
     mcp_server._log_file = None
@@ -1,17 +1,20 @@
-import os
+import pytest
 
 from codex_mem import mcp_server
 
 
-def test_mcp_tools_round_trip(tmp_path):
-    os.environ["CODEX_MEM_HOME"] = str(tmp_path / "memhome4")
-    project_dir = tmp_path / "proj"
-    project_dir.mkdir()
-    (project_dir / ".git").mkdir()
+@pytest.fixture
+def fresh_server(monkeypatch, tmp_path):
+    monkeypatch.setenv("CODEX_MEM_HOME", str(tmp_path / "memhome4"))
+    monkeypatch.setattr(mcp_server, "_store", None)
+    monkeypatch.setattr(mcp_server, "_settings", None)
+    yield
+    # Close the connection the tools opened; monkeypatch then restores the old globals.
+    mcp_server._close_store()
 
-    # reset globals
-    mcp_server._store = None
-    mcp_server._settings = None
+
+def test_mcp_tools_round_trip(fresh_server, git_project):
+    project_dir = git_project
 
     add_resp = mcp_server.mem_add(
         text="Use pytest for integration tests",
@@ -27,9 +30,3 @@ def test_mcp_tools_round_trip(tmp_path):
 
     context = mcp_server.mem_recall(prompt="testing", cwd=str(project_dir))
     assert "Relevant memories" in context
-
-    # cleanup
-    if mcp_server._store:
-        mcp_server._store.close()
-        mcp_server._store = None
-        mcp_server._settings = None
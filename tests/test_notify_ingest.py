@@ -1,15 +1,20 @@
-import os
+import pytest
 
 from codex_mem.config import Settings
 from codex_mem.notify import ingest_event
 from codex_mem.store import Store
 
 
-def test_ingest_event_writes_turn_and_memories(tmp_path):
-    os.environ["CODEX_MEM_HOME"] = str(tmp_path / "memhome3")
-    project_dir = tmp_path / "proj"
-    project_dir.mkdir()
-    (project_dir / ".git").mkdir()
+@pytest.fixture(scope="module")
+def settings():
+    # Built once and independent of the caller's env. Ingest logic doesn't depend on the DB
+    # file; the CLI and MCP tests cover the on-disk path.
+    return Settings(db_uri=":memory:", fast_pragmas=True)
+
+
+def test_ingest_event_writes_turn_and_memories(monkeypatch, tmp_path, git_project, settings):
+    monkeypatch.setenv("CODEX_MEM_HOME", str(tmp_path / "memhome3"))
+    project_dir = git_project
 
     payload = {
         "thread-id": "t1",
@@ -18,13 +23,86 @@ def test_ingest_event_writes_turn_and_memories(tmp_path):
         "input-messages": ["Please always run ruff format."],
         "last-assistant-message": "We decided to enable lint checks.",
     }
-    settings = Settings.from_env()
     store = Store(settings)
     ok = ingest_event(payload, settings, store)
     assert ok
 
     turns = store.conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
-    memories = store.conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+    has_memories = store.conn.execute("SELECT EXISTS(SELECT 1 FROM memories)").fetchone()[0]
     assert turns == 1
-    assert memories >= 1
+    assert has_memories == 1
+    store.close()
+
+
+def test_is_allowed_applies_allow_and_deny_globs(tmp_path):
+    from codex_mem.notify import _is_allowed
+
+    settings = Settings(allow_globs=[f"{tmp_path}/*"], deny_globs=["*/private*"])
+    assert _is_allowed(tmp_path / "proj", settings)
+    assert not _is_allowed(tmp_path / "private-notes", settings)
+    assert not _is_allowed(tmp_path.parent / "elsewhere", settings)
+
+
+def test_ingest_event_dedupes_repeated_turn(monkeypatch, tmp_path, settings):
+    monkeypatch.setenv("CODEX_MEM_HOME", str(tmp_path / "memhome-dedupe"))
+    payload = {
+        "thread-id": "t1",
+        "turn-id": "3",
+        "cwd": str(tmp_path),
+        "input-messages": ["Avoid global state in tests."],
+        "last-assistant-message": "Noted.",
+    }
+    store = Store(settings)
+    assert ingest_event(payload, settings, store)
+    assert ingest_event(payload, settings, store)
+
+    hashes = [row[0] for row in store.conn.execute("SELECT hash FROM turns")]
+    assert len(hashes) == 1
+    assert len(hashes[0]) == 32
+    store.close()
+
+
+def test_ingest_event_redacts_secrets_before_storing(monkeypatch, tmp_path, settings):
+    monkeypatch.setenv("CODEX_MEM_HOME", str(tmp_path / "memhome-redact"))
+    secret = "AKIA1234567890123456"
+    payload = {
+        "thread-id": "t1",
+        "turn-id": "4",
+        "cwd": str(tmp_path),
+        "input-messages": [f"We will use key {secret} for deploys."],
+        "last-assistant-message": f"Stored {secret}.",
+    }
+    store = Store(settings)
+    assert ingest_event(payload, settings, store)
+
+    row = store.conn.execute("SELECT input_messages_json, assistant_message FROM turns").fetchone()
+    memories = [r[0] for r in store.conn.execute("SELECT text FROM memories")]
+    assert secret not in row[0] and secret not in row[1]
+    assert all(secret not in text for text in memories)
+    store.close()
+
+
+def test_ingest_event_extracts_outside_write_transaction(monkeypatch, tmp_path, settings):
+    from codex_mem import notify
+
+    monkeypatch.setenv("CODEX_MEM_HOME", str(tmp_path / "memhome-extract"))
+    store = Store(settings)
+    calls = []
+
+    def fake_extract(turn, settings):
+        calls.append(store.conn.in_transaction)
+        return []
+
+    monkeypatch.setattr(notify, "extract_memories", fake_extract)
+    payload = {
+        "thread-id": "t1",
+        "turn-id": "5",
+        "cwd": str(tmp_path),
+        "input-messages": ["We decided to keep extraction lock-free."],
+        "last-assistant-message": "Ok.",
+    }
+    assert ingest_event(payload, settings, store)
+    assert ingest_event(payload, settings, store)
+    # Extraction ran once (the duplicate was probed away) and never under the write lock.
+    assert calls == [False]
     store.close()
@@ -0,0 +1,12 @@
+from codex_mem.paths import detect_project_root
+
+
+def test_detect_project_root_picks_up_new_marker(tmp_path):
+    project_dir = tmp_path / "later-repo"
+    (project_dir / "src").mkdir(parents=True)
+    cwd = project_dir / "src"
+
+    assert detect_project_root(cwd, [".cm-test-marker"]) is None
+    (project_dir / ".cm-test-marker").mkdir()
+    assert detect_project_root(cwd, [".cm-test-marker"]) == project_dir.resolve()
+    assert detect_project_root(cwd, [".cm-test-marker"]) == project_dir.resolve()
@@ -1,15 +1,27 @@
-import os
+import pytest
 
 from codex_mem.config import Settings
 from codex_mem.models import MemoryCandidate, MemoryKind
 from codex_mem.store import Store
 
 
-def test_store_insert_and_search(tmp_path):
-    os.environ["CODEX_MEM_HOME"] = str(tmp_path / "memhome")
-    settings = Settings.from_env()
-    store = Store(settings)
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    # One in-memory DB per module; each test scopes its rows to its own tmp_path project root.
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("CODEX_MEM_HOME", str(tmp_path_factory.mktemp("memhome")))
+        mp.setenv("CODEX_MEM_DB_URI", ":memory:")
+        store = Store(Settings.from_env())
+        yield store
+        store.close()
 
+
+def _count(store, project_root):
+    sql = "SELECT COUNT(*) FROM memories WHERE project_root = ?"
+    return store.conn.execute(sql, (str(project_root),)).fetchone()[0]
+
+
+def test_store_insert_and_search(store, tmp_path):
     project_root = tmp_path / "project"
     project_root.mkdir()
 
@@ -23,16 +35,117 @@ def test_store_insert_and_search(tmp_path):
 
     stats = store.stats()
     assert "db_path" in stats
-    store.close()
 
 
 def test_store_merge_similar(tmp_path):
-    os.environ["CODEX_MEM_HOME"] = str(tmp_path / "memhome2")
-    settings = Settings.from_env()
-    store = Store(settings)
+    # Global (NULL-scope) memories need an empty DB, so this one skips the shared store.
+    store = Store(Settings(db_uri=":memory:"))
 
     candidate = MemoryCandidate(kind=MemoryKind.DECISION, text="We will use Typer", importance=3)
     mem_id = store.add_memory(candidate, project_root=None)
     merged_id = store.add_memory(candidate, project_root=None)
     assert merged_id == mem_id
+    # Scope is part of the match: the same text under a project stays a separate row.
+    scoped_id = store.add_memory(candidate, project_root=tmp_path)
+    assert scoped_id != mem_id
+    assert store.add_memory(candidate, project_root=tmp_path) == scoped_id
     store.close()
+
+
+def test_store_transaction_rolls_back_on_error(store, tmp_path):
+    candidate = MemoryCandidate(kind=MemoryKind.FACT, text="Using SQLite WAL", importance=3)
+    try:
+        with store.transaction():
+            store.add_memory(candidate, project_root=tmp_path)
+            raise RuntimeError("abort batch")
+    except RuntimeError:
+        pass
+    assert _count(store, tmp_path) == 0
+
+    with store.transaction():
+        store.add_memory(candidate, project_root=tmp_path)
+    assert _count(store, tmp_path) == 1
+
+
+def test_store_iter_all_pages_by_id(store, tmp_path):
+    texts = ["Prefer tabs in Makefiles", "Run migrations before deploy", "Docs live in wiki"]
+    kinds = [MemoryKind.PREFERENCE, MemoryKind.WORKFLOW, MemoryKind.REFERENCE]
+    ids = [
+        store.add_memory(MemoryCandidate(kind=kind, text=text), project_root=tmp_path)
+        for kind, text in zip(kinds, texts)
+    ]
+
+    rows = list(store.iter_all(project_root=tmp_path, include_global=False, batch=2))
+    assert [row["id"] for row in rows] == ids
+
+
+def test_store_merge_uses_token_similarity(store, tmp_path):
+    first = MemoryCandidate(kind=MemoryKind.FACT, text="The API runs on port 8080")
+    reordered = MemoryCandidate(kind=MemoryKind.FACT, text="On port 8080 the API runs.")
+    unrelated = MemoryCandidate(kind=MemoryKind.FACT, text="Docs are built with mkdocs")
+    mem_id = store.add_memory(first, project_root=tmp_path)
+    assert store.add_memory(reordered, project_root=tmp_path) == mem_id
+    assert store.add_memory(unrelated, project_root=tmp_path) != mem_id
+
+    rows = store.search("8080", project_root=tmp_path, limit=5, include_global=False)
+    assert [row["id"] for row in rows] == [mem_id]
+
+
+def test_store_merge_catches_one_word_edits(store, tmp_path):
+    # Word-set Jaccard scored these 0.60 / 0.80 and stopped merging them at the 0.82 default.
+    pairs = [
+        ("Prefer pytest over unittest", "Prefer pytest to unittest"),
+        ("Add tests for export", "Add tests for the export"),
+    ]
+    for first, edited in pairs:
+        mem_id = store.add_memory(MemoryCandidate(kind=MemoryKind.PREFERENCE, text=first), tmp_path)
+        merged = MemoryCandidate(kind=MemoryKind.PREFERENCE, text=edited)
+        assert store.add_memory(merged, tmp_path) == mem_id
+
+    # A different choice with the same sentence frame is not a duplicate.
+    typer = store.add_memory(
+        MemoryCandidate(kind=MemoryKind.DECISION, text="We will use Typer"), tmp_path
+    )
+    click = MemoryCandidate(kind=MemoryKind.DECISION, text="We will use Click")
+    assert store.add_memory(click, tmp_path) != typer
+
+
+def test_store_add_memories_merges_within_batch(store, tmp_path):
+    candidates = [
+        MemoryCandidate(kind=MemoryKind.TODO, text="Add tests for export"),
+        MemoryCandidate(kind=MemoryKind.TODO, text="add tests for export."),
+        MemoryCandidate(kind=MemoryKind.PITFALL, text="Avoid OFFSET pagination"),
+    ]
+    with store.transaction():
+        assert store.add_memories(candidates, project_root=tmp_path) == 2
+        try:
+            with store.transaction():
+                store.add_memories(
+                    [MemoryCandidate(kind=MemoryKind.FACT, text="Rolled back")], tmp_path
+                )
+                raise RuntimeError("inner failure")
+        except RuntimeError:
+            pass
+
+    sql = "SELECT text FROM memories WHERE project_root = ? ORDER BY id"
+    texts = [row[0] for row in store.conn.execute(sql, (str(tmp_path),))]
+    assert len(texts) == 2
+    assert texts[0].startswith("Add tests for export")
+    assert texts[1] == "Avoid OFFSET pagination"
+
+
+def test_store_keeps_fts_in_sync_without_triggers(store, tmp_path):
+    fact = MemoryCandidate(kind=MemoryKind.FACT, text="Cache lives in redis")
+    mem_id = store.add_memory(fact, tmp_path)
+    store.add_memories(
+        [MemoryCandidate(kind=MemoryKind.TODO, text="Rotate the staging keys")], tmp_path
+    )
+    assert store.update_memory(mem_id, text="Cache lives in memcached")
+
+    def search(query):
+        return store.search(query, project_root=tmp_path, limit=5, include_global=False)
+
+    assert search("redis") == []
+    assert [row["id"] for row in search("memcached")] == [mem_id]
+    assert search("staging")
+    store.conn.execute("INSERT INTO memory_fts(memory_fts) VALUES ('integrity-check')")